@@ -1,45 +1,197 @@
 from PIL import Image
 import io
+import os
+import asyncio
 import pandas as pd
 import numpy as np
 import cv2
+import torch
 
 from typing import Optional
 
+from loguru import logger
+
 from ultralytics import YOLO
-from ultralytics.utils.plotting import Annotator, colors
+from ultralytics.utils.plotting import colors
+
+# Optional: PyTurboJPEG decodes JPEG faster than OpenCV, fall back to cv2.imdecode without it
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    turbo_jpeg = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    turbo_jpeg = None
+
+
+def load_model(weights: str, task: str = "detect") -> YOLO:
+    """
+    Load a YOLO model, preferring the exported TensorRT engine.
+
+    The engine (see export_model.py) is used only when CUDA is available and
+    `<weights>.engine` exists next to the weights, otherwise the PyTorch `.pt` is loaded.
+
+    Args:
+        weights (str): Path to the PyTorch weights (.pt).
+        task (str, optional): The model task, needed because engines don't store it. Defaults to "detect".
+
+    Returns:
+        YOLO: The loaded model.
+    """
+    engine = os.path.splitext(weights)[0] + ".engine"
+    if torch.cuda.is_available() and os.path.exists(engine):
+        return YOLO(engine, task=task)
+    return YOLO(weights, task=task)
 
 
 # Initialize the models
-model_sample_detect = YOLO("./models/sample_model/best.pt")
+model_sample_detect = load_model("./models/sample_model/best.pt")
 
 
-def get_image_from_bytes(binary_image: bytes) -> Image:
-    """Convert image from bytes to PIL RGB format
+def get_image_from_bytes(binary_image: bytes) -> np.ndarray:
+    """Convert image from bytes to OpenCV BGR format
     
     **Args:**
         - **binary_image (bytes):** The binary representation of the image
     
     **Returns:**
-        - **PIL.Image:** The image in PIL RGB format
-    """
-    input_image = Image.open(io.BytesIO(binary_image)).convert("RGB")
-    return input_image
+        - **np.ndarray:** The image as a contiguous uint8 BGR array (the channel order YOLO expects for arrays)
 
-def get_bytes_from_image(image: Image) -> bytes:
+    **Raises:**
+        - **ValueError:** If the bytes are empty, can't be decoded, or the image has more than `PIL.Image.MAX_IMAGE_PIXELS` pixels
     """
-    Convert PIL image to Bytes
+    if not binary_image:
+        raise ValueError("Empty image")
+
+    # Read the dimensions from the header first, so oversized images (decompression bombs)
+    # are rejected before the decoded buffer is allocated
+    use_turbo_jpeg = turbo_jpeg is not None and binary_image[:2] == b'\xff\xd8'  # JPEG magic bytes
+    pil_image = None
+    size = None
+    if use_turbo_jpeg:
+        try:
+            size = turbo_jpeg.decode_header(binary_image)[:2]
+        except OSError as e:
+            logger.warning(f"TurboJPEG header read failed, falling back to PIL: {e}")
+            use_turbo_jpeg = False
+    if size is None:
+        try:
+            # lazy: only the header is read here
+            pil_image = Image.open(io.BytesIO(binary_image))
+        except (OSError, Image.DecompressionBombError) as e:
+            raise ValueError("Unable to decode the image") from e
+        size = pil_image.size
+    if Image.MAX_IMAGE_PIXELS is not None and size[0] * size[1] > Image.MAX_IMAGE_PIXELS:
+        raise ValueError(f"Image is too large ({size[0]}x{size[1]} pixels)")
+
+    # JPEG through libjpeg-turbo when available
+    if use_turbo_jpeg:
+        try:
+            return turbo_jpeg.decode(binary_image, pixel_format=TJPF_BGR)
+        except OSError as e:
+            logger.warning(f"TurboJPEG decode failed, falling back to OpenCV: {e}")
+    # EXIF orientation is ignored, as with the previous PIL decoding
+    input_image = cv2.imdecode(np.frombuffer(binary_image, dtype=np.uint8), cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
+    if input_image is not None:
+        return input_image
+    # formats the OpenCV build can't read (e.g. GIF): decode with PIL
+    try:
+        if pil_image is None:
+            pil_image = Image.open(io.BytesIO(binary_image))
+        input_image = pil_image.convert("RGB")
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError("Unable to decode the image") from e
+    return cv2.cvtColor(np.asarray(input_image), cv2.COLOR_RGB2BGR)
+
+def get_bytes_from_image(image: np.ndarray) -> bytes:
+    """
+    Convert image to Bytes
     
     Args:
-    image (Image): A PIL image instance
+    image (np.ndarray): A BGR image array (a PIL image instance is also accepted)
     
     Returns:
     bytes : BytesIO object that contains the image in JPEG format with quality 85
     """
-    return_image = io.BytesIO()
-    image.save(return_image, format='JPEG', quality=85)  # save the image in JPEG format with quality 85
-    return_image.seek(0)  # set the pointer to the beginning of the file
-    return return_image
+    if isinstance(image, Image.Image):
+        return_image = io.BytesIO()
+        image.save(return_image, format='JPEG', quality=85)  # save the image in JPEG format with quality 85
+        return_image.seek(0)  # set the pointer to the beginning of the file
+        return return_image
+
+    # encode with OpenCV (libjpeg-turbo) in JPEG format with quality 85
+    ok, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    if not ok:
+        raise ValueError("Unable to encode the image")
+    return io.BytesIO(buffer.tobytes())
+
+def get_labels_array(labeles_dict: dict) -> Optional[np.ndarray]:
+    """
+    Get the label names as an array indexed by class id.
+
+    Args:
+        labeles_dict (dict): A dictionary containing the labels names, where the keys are the class ids and the values are the label names.
+
+    Returns:
+        np.ndarray: The label names, or None if the class ids aren't contiguous from 0.
+    """
+    if sorted(labeles_dict) != list(range(len(labeles_dict))):
+        return None
+    return np.array([labeles_dict[i] for i in range(len(labeles_dict))], dtype=object)
+
+def transform_boxes_to_dict(boxes_data: np.ndarray, labeles_dict: dict, labels: Optional[np.ndarray] = None) -> dict:
+    """
+    Transform the boxes data of a yolov8 result (copied to the CPU) to a dict of numpy arrays.
+
+    Args:
+        boxes_data (np.ndarray): The `Boxes.data` array, one row (xmin, ymin, xmax, ymax, confidence, class) per box.
+        labeles_dict (dict): A dictionary containing the labels names, where the keys are the class ids and the values are the label names.
+        labels (np.ndarray, optional): The label names indexed by class id (see get_labels_array), looked up in labeles_dict if not given. Defaults to None.
+        
+    Returns:
+        predict (dict): A dict with the bounding box coordinates ('xyxy', shape (n, 4)), confidence scores ('confidence'), class ids ('class') and class labels ('name').
+    """
+    classes = boxes_data[:, 5].astype(int)
+    # Replace the class number with the class name
+    if labels is not None:
+        names = labels[classes]
+    else:
+        names = np.array([labeles_dict[c] for c in classes], dtype=object)
+    return {
+        'xyxy': boxes_data[:, :4],
+        'confidence': boxes_data[:, 4],
+        'class': classes,
+        'name': names,
+    }
+
+def transform_predict_to_dict(results: list, labeles_dict: dict) -> dict:
+    """
+    Transform predict from yolov8 (torch.Tensor) to a dict of numpy arrays.
+
+    Args:
+        results (list): A list containing the predict output from yolov8 in the form of a torch.Tensor.
+        labeles_dict (dict): A dictionary containing the labels names, where the keys are the class ids and the values are the label names.
+        
+    Returns:
+        predict (dict): A dict with the bounding box coordinates ('xyxy', shape (n, 4)), confidence scores ('confidence'), class ids ('class') and class labels ('name').
+    """
+    # Copy the boxes to the CPU once (a single tensor holds xyxy, conf and cls)
+    boxes_data = results[0].boxes.data.float().cpu().numpy()
+    return transform_boxes_to_dict(boxes_data, labeles_dict)
+
+def predict_dict_to_df(predict: dict) -> pd.DataFrame:
+    """
+    Build the pandas DataFrame from a predict dict (see transform_predict_to_dict).
+
+    Args:
+        predict (dict): The predict dict.
+        
+    Returns:
+        predict_bbox (pd.DataFrame): A DataFrame containing the bounding box coordinates, confidence scores and class labels.
+    """
+    predict_bbox = pd.DataFrame(predict['xyxy'], columns=['xmin', 'ymin', 'xmax','ymax'])
+    predict_bbox['confidence'] = predict['confidence']
+    predict_bbox['class'] = predict['class']
+    predict_bbox['name'] = predict['name']
+    return predict_bbox
 
 def transform_predict_to_df(results: list, labeles_dict: dict) -> pd.DataFrame:
     """
@@ -52,23 +204,31 @@ def transform_predict_to_df(results: list, labeles_dict: dict) -> pd.DataFrame:
     Returns:
         predict_bbox (pd.DataFrame): A DataFrame containing the bounding box coordinates, confidence scores and class labels.
     """
-    # Transform the Tensor to numpy array
-    predict_bbox = pd.DataFrame(results[0].to("cpu").numpy().boxes.xyxy, columns=['xmin', 'ymin', 'xmax','ymax'])
-    # Add the confidence of the prediction to the DataFrame
-    predict_bbox['confidence'] = results[0].to("cpu").numpy().boxes.conf
-    # Add the class of the prediction to the DataFrame
-    predict_bbox['class'] = (results[0].to("cpu").numpy().boxes.cls).astype(int)
-    # Replace the class number with the class name from the labeles_dict
-    predict_bbox['name'] = predict_bbox["class"].replace(labeles_dict)
-    return predict_bbox
+    return predict_dict_to_df(transform_predict_to_dict(results, labeles_dict))
+
+def get_device_args(model: YOLO) -> dict:
+    """
+    Get the device arguments for model.predict.
+    PyTorch models run in FP16 on the first GPU when CUDA is available. Exported
+    models (e.g. TensorRT engines) keep the precision they were exported with.
+
+    Args:
+        model (YOLO): The trained YOLO model.
+
+    Returns:
+        dict: The predict keyword arguments (empty on CPU or for exported models).
+    """
+    if torch.cuda.is_available() and isinstance(model.model, torch.nn.Module):
+        return {'half': True, 'device': 0}
+    return {}
 
-def get_model_predict(model: YOLO, input_image: Image, save: bool = False, image_size: int = 1248, conf: float = 0.5, augment: bool = False) -> pd.DataFrame:
+def get_model_predict(model: YOLO, input_image: np.ndarray, save: bool = False, image_size: int = 1248, conf: float = 0.5, augment: bool = False) -> pd.DataFrame:
     """
     Get the predictions of a model on an input image.
     
     Args:
         model (YOLO): The trained YOLO model.
-        input_image (Image): The image on which the model will make predictions.
+        input_image (np.ndarray): The BGR image on which the model will make predictions.
         save (bool, optional): Whether to save the image with the predictions. Defaults to False.
         image_size (int, optional): The size of the image the model will receive. Defaults to 1248.
         conf (float, optional): The confidence threshold for the predictions. Defaults to 0.5.
@@ -77,30 +237,65 @@ def get_model_predict(model: YOLO, input_image: Image, save: bool = False, image
     Returns:
         pd.DataFrame: A DataFrame containing the predictions.
     """
+    predict = get_model_batch_predict(
+        model=model,
+        input_images=[input_image],
+        save=save,
+        image_size=image_size,
+        conf=conf,
+        augment=augment,
+    )[0]
+    return predict_dict_to_df(predict)
+
+
+def get_model_batch_predict(model: YOLO, input_images: list, save: bool = False, image_size: int = 1248, conf: float = 0.5, augment: bool = False, labels: Optional[np.ndarray] = None) -> list:
+    """
+    Get the predictions of a model on a batch of input images in a single predict call.
+    
+    Args:
+        model (YOLO): The trained YOLO model.
+        input_images (list): The BGR images (np.ndarray) on which the model will make predictions.
+        save (bool, optional): Whether to save the images with the predictions. Defaults to False.
+        image_size (int, optional): The size of the image the model will receive. Defaults to 1248.
+        conf (float, optional): The confidence threshold for the predictions. Defaults to 0.5.
+        augment (bool, optional): Whether to apply data augmentation on the input images. Defaults to False.
+        labels (np.ndarray, optional): The model's label names indexed by class id (see get_labels_array). Defaults to None.
+    
+    Returns:
+        list: A list of predict dicts (see transform_predict_to_dict), one per input image (same order).
+    """
     # Make predictions
-    predictions = model.predict(
-                        imgsz=image_size, 
-                        source=input_image, 
-                        conf=conf,
-                        save=save, 
-                        augment=augment,
-                        flipud= 0.0,
-                        fliplr= 0.0,
-                        mosaic = 0.0,
-                        )
+    with torch.inference_mode():
+        predictions = model.predict(
+                            imgsz=image_size, 
+                            source=input_images, 
+                            conf=conf,
+                            save=save, 
+                            augment=augment,
+                            flipud= 0.0,
+                            fliplr= 0.0,
+                            mosaic = 0.0,
+                            **get_device_args(model),
+                            )
     
-    # Transform predictions to pandas dataframe
-    predictions = transform_predict_to_df(predictions, model.model.names)
-    return predictions
+    # Copy the boxes of the whole batch to the CPU in a single transfer (one stream sync)
+    counts = [len(result.boxes) for result in predictions]
+    boxes_data = torch.cat([result.boxes.data for result in predictions]).float().cpu().numpy()
 
+    # Transform predictions to numpy arrays, the DataFrame is only built where needed
+    return [
+        transform_boxes_to_dict(result_boxes, result.names, labels)
+        for result, result_boxes in zip(predictions, np.split(boxes_data, np.cumsum(counts)[:-1]))
+    ]
 
-def get_model_segment(model: YOLO, input_image: Image, save: bool = False, image_size: int = 1248, conf: float = 0.25, augment: bool = False) -> pd.DataFrame:
+
+def get_model_segment(model: YOLO, input_image: np.ndarray, save: bool = False, image_size: int = 1248, conf: float = 0.25, augment: bool = False) -> pd.DataFrame:
     """
     Get the predictions of a model on an input image.
     
     Args:
         model (YOLO): The trained YOLO model.
-        input_image (Image): The image on which the model will make predictions.
+        input_image (np.ndarray): The BGR image on which the model will make predictions.
         save (bool, optional): Whether to save the image with the predictions. Defaults to False.
         image_size (int, optional): The size of the image the model will receive. Defaults to 1248.
         conf (float, optional): The confidence threshold for the predictions. Defaults to 0.25.
@@ -110,115 +305,322 @@ def get_model_segment(model: YOLO, input_image: Image, save: bool = False, image
         pd.DataFrame: A DataFrame containing the predictions.
     """
     # Make predictions
-    predictions = model.predict(
-                        imgsz=image_size, 
-                        source=input_image, 
-                        conf=conf,
-                        save=save, 
-                        augment=augment,
-                        flipud= 0.0,
-                        fliplr= 0.0,
-                        mosaic = 0.0,
-                        )
+    with torch.inference_mode():
+        predictions = model.predict(
+                            imgsz=image_size, 
+                            source=input_image, 
+                            conf=conf,
+                            save=save, 
+                            augment=augment,
+                            flipud= 0.0,
+                            fliplr= 0.0,
+                            mosaic = 0.0,
+                            **get_device_args(model),
+                            )
     
     # Transform predictions to pandas dataframe
-    predictions = transform_predict_to_df(predictions, model.model.names)
+    predictions = transform_predict_to_df(predictions, predictions[0].names)
     return predictions
 
 
 ################################# BBOX Func #####################################
 
-def add_bboxs_on_img(image: Image, predict: pd.DataFrame()) -> Image:
+# BGR box color per class id (the ultralytics palette, cycled for larger ids), computed once
+BBOX_COLORS = [colors(i, True) for i in range(colors.n)]
+
+def add_bboxs_on_img(image: np.ndarray, predict: dict) -> np.ndarray:
     """
     add a bounding box on the image
 
     Args:
-    image (Image): input image
-    predict (pd.DataFrame): predict from model
+    image (np.ndarray): input BGR image, the boxes are drawn in place
+    predict (dict): predict dict from model (see transform_predict_to_dict)
 
     Returns:
-    Image: image whis bboxs
+    np.ndarray: BGR image whis bboxs
     """
-    # Create an annotator object
-    annotator = Annotator(np.array(image))
+    # sort the predict arrays by xmin value
+    order = np.argsort(predict['xyxy'][:, 0], kind='stable')
+    xyxy = predict['xyxy'][order].astype(int)
+    confs = predict['confidence'][order]
+    names = predict['name'][order]
+    classes = predict['class'][order]
+
+    # line width and font size scaled with the image, as in the ultralytics Annotator
+    line_width = max(round(sum(image.shape[:2]) / 2 * 0.003), 2)
+    font_scale = line_width / 3
+    font_thickness = max(line_width - 1, 1)
+
+    for i in range(len(xyxy)):
+        x1, y1, x2, y2 = (int(v) for v in xyxy[i])
+        color = BBOX_COLORS[classes[i] % len(BBOX_COLORS)]
+        # create the text to be displayed on image
+        text = f"{names[i]}: {int(confs[i]*100)}%"
+        # add the bounding box on the image
+        cv2.rectangle(image, (x1, y1), (x2, y2), color, line_width, cv2.LINE_AA)
+        # add the text on a filled label, above the box or inside it when there is no room
+        (text_width, text_height), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, font_thickness)
+        outside = y1 >= text_height + 3
+        label_y = y1 - text_height - 3 if outside else y1 + text_height + 3
+        cv2.rectangle(image, (x1, y1), (x1 + text_width, label_y), color, -1, cv2.LINE_AA)
+        cv2.putText(image, text, (x1, y1 - 2 if outside else y1 + text_height + 2), cv2.FONT_HERSHEY_SIMPLEX,
+                    font_scale, (255, 255, 255), font_thickness, cv2.LINE_AA)
+    return image
+
+
+def add_no_objects_text(image: np.ndarray) -> np.ndarray:
+    """
+    Add annotated text to the image stating no objects detected
 
-    # sort predict by xmin value
-    predict = predict.sort_values(by=['xmin'], ascending=True)
+    Args:
+    image (np.ndarray): input BGR image, the text is drawn in place
 
-    # iterate over the rows of predict dataframe
-    for i, row in predict.iterrows():
-        # create the text to be displayed on image
-        text = f"{row['name']}: {int(row['confidence']*100)}%"
-        # get the bounding box coordinates
-        bbox = [row['xmin'], row['ymin'], row['xmax'], row['ymax']]
-        # add the bounding box and text on the image
-        annotator.box_label(bbox, text, color=colors(row['class'], True))
-    # convert the annotated image to PIL image
-    return Image.fromarray(annotator.result())
+    Returns:
+    np.ndarray: BGR image with the text
+    """
+    text = "NO OBJECTS DETECTED."
+    # orange text with a black outline (the outline is the same text drawn thicker underneath)
+    cv2.putText(image, text, (20, 35), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 5, cv2.LINE_AA)
+    cv2.putText(image, text, (20, 35), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 165, 255), 2, cv2.LINE_AA)
+    return image
 
 
 ################################# Models #####################################
 
 
-def detect_sample_model(input_image: Image) -> pd.DataFrame:
+def warmup_sample_model() -> None:
     """
-    Predict from sample_model.
-    Base on YoloV8
+    Run sample_model once on a blank image so the first request doesn't pay for
+    CUDA context creation, allocator warmup or TensorRT engine deserialization.
+    """
+    predict_sample_batch([np.zeros((768, 768, 3), dtype=np.uint8)])
+
+
+# Label names of sample_model indexed by class id, built on first use
+# (an engine-backed model only knows its names once its predictor is set up)
+sample_labels: Optional[np.ndarray] = None
+
+def predict_sample_batch(input_images: list) -> list:
+    """
+    Predict a batch of images with sample_model.
 
     Args:
-        input_image (Image): The input image.
+        input_images (list): The BGR images (np.ndarray).
 
     Returns:
-        pd.DataFrame: DataFrame containing the object location.
+        list: A list of predict dicts, one per input image.
     """
-    predict = get_model_predict(
+    global sample_labels
+    if sample_labels is None:
+        sample_labels = get_labels_array(model_sample_detect.names)
+    return get_model_batch_predict(
         model=model_sample_detect,
-        input_image=input_image,
+        input_images=input_images,
         save=False,
         image_size=768,
         augment=False,
         conf=0.5,
+        labels=sample_labels,
     )
-    return predict
 
-def censor_objects(image: Image, predictions: pd.DataFrame, method: str) -> Image:
+
+# Micro-batching of concurrent detect requests:
+# requests arriving within DETECT_BATCH_TIMEOUT are grouped (up to DETECT_BATCH_SIZE)
+# and sent to the model in one predict call.
+# For a TensorRT engine the size is capped by the max batch it was exported with
+# (export_model.py --batch, 8 by default), see get_detect_batch_size.
+DETECT_BATCH_SIZE = 8
+DETECT_BATCH_TIMEOUT = 0.01  # seconds
+
+_detect_queue: Optional[asyncio.Queue] = None
+_detect_worker: Optional[asyncio.Task] = None
+
+
+def start_detect_batcher() -> None:
     """
-    Censor detected objects in an image using OpenCV.
+    Start the background task batching detect_sample_model requests, if it isn't running
+    in the current event loop. Must be called from the running event loop; detect_sample_model
+    calls it on demand, the FastAPI startup hook only starts it ahead of the first request.
+    """
+    global _detect_queue, _detect_worker
+    if (_detect_worker is not None and not _detect_worker.done()
+            and _detect_worker.get_loop() is asyncio.get_running_loop()):
+        return
+    _detect_queue = asyncio.Queue()
+    _detect_worker = asyncio.create_task(_detect_batch_worker())
+
+
+async def stop_detect_batcher() -> None:
+    """
+    Stop the background batching task (FastAPI shutdown).
+    """
+    global _detect_worker
+    if _detect_worker is None:
+        return
+    _detect_worker.cancel()
+    try:
+        await _detect_worker
+    except asyncio.CancelledError:
+        pass
+    _detect_worker = None
+
+
+def get_detect_batch_size() -> int:
+    """
+    Get the max number of images per sample_model predict call: DETECT_BATCH_SIZE,
+    capped by the max batch of an exported engine (export_model.py --batch).
+
+    Returns:
+        int: The batch size.
+    """
+    if isinstance(model_sample_detect.model, torch.nn.Module):
+        return DETECT_BATCH_SIZE
+    # exported model: reading the names sets up the predictor, whose backend
+    # holds the batch size from the engine metadata (the max batch for dynamic engines)
+    model_sample_detect.names
+    engine_batch = getattr(getattr(model_sample_detect.predictor, 'model', None), 'batch', None)
+    if not engine_batch:
+        return DETECT_BATCH_SIZE
+    return max(1, min(DETECT_BATCH_SIZE, int(engine_batch)))
+
+
+async def _detect_batch_worker() -> None:
+    """
+    Collect pending (image, future) pairs and resolve them with one batched prediction.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        # setting up an engine backend blocks, keep it off the event loop
+        batch_size = await loop.run_in_executor(None, get_detect_batch_size)
+    except Exception as e:
+        logger.warning(f"Unable to read the model batch size, using {DETECT_BATCH_SIZE}: {e}")
+        batch_size = DETECT_BATCH_SIZE
+    while True:
+        # wait for the first request, then fill the batch until the window closes
+        batch = [await _detect_queue.get()]
+        deadline = loop.time() + DETECT_BATCH_TIMEOUT
+        while len(batch) < batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_detect_queue.get(), timeout=timeout))
+            except asyncio.TimeoutError:
+                break
+
+        images = [image for image, _ in batch]
+        try:
+            # run the blocking predict outside the event loop
+            predicts = await loop.run_in_executor(None, predict_sample_batch, images)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            continue
+
+        for (_, future), predict in zip(batch, predicts):
+            if not future.done():
+                future.set_result(predict)
+
+
+async def detect_sample_model(input_image: np.ndarray) -> dict:
+    """
+    Predict from sample_model.
+    Base on YoloV8
+
+    The request is queued and predicted together with other concurrent requests
+    (the batching task is started on the first call, see start_detect_batcher).
 
     Args:
-    image (Image): The original PIL image.
-    predictions (pd.DataFrame): DataFrame containing detection results with bounding boxes.
-    method (str): Method of censorship ('blur' for Gaussian blur or 'mask' for a solid color mask). Default is 'blur'.
+        input_image (np.ndarray): The input BGR image.
 
     Returns:
-    Image: The censored image as a PIL image.
+        dict: Predict dict containing the object location (see transform_predict_to_dict),
+        accepted as is by add_bboxs_on_img and censor_objects; use predict_dict_to_df to get a DataFrame.
     """
-    # Convert PIL image to OpenCV format (PIL uses RGB, OpenCV uses BGR)
-    open_cv_image = np.array(image.convert('RGB'))[:, :, ::-1]
+    start_detect_batcher()
+    future = asyncio.get_running_loop().create_future()
+    await _detect_queue.put((input_image, future))
+    return await future
+
+# Gaussian blur used to censor objects. The kernel size matches the one OpenCV
+# derives from sigma for uint8 images (round(6 * sigma + 1) | 1), so it isn't recomputed per call.
+CENSOR_BLUR_SIGMA = 10
+CENSOR_BLUR_KSIZE = (61, 61)
 
-    for index, row in predictions.iterrows():
-        # Extract bounding box coordinates
-        x1, y1, x2, y2 = int(row['xmin']), int(row['ymin']), int(row['xmax']), int(row['ymax'])
+def blur_roi(roi: np.ndarray) -> np.ndarray:
+    """
+    Apply the censor Gaussian blur to an image region.
 
-        if method == 'blur':
-            # Apply Gaussian blur to the specified area (bounding box)
-            open_cv_image[y1:y2, x1:x2] = cv2.GaussianBlur(open_cv_image[y1:y2, x1:x2], (0, 0), 10)
-        elif method == 'mask':
+    Args:
+    roi (np.ndarray): The image region.
+
+    Returns:
+    np.ndarray: The blurred region.
+    """
+    return cv2.GaussianBlur(roi, CENSOR_BLUR_KSIZE, CENSOR_BLUR_SIGMA)
+
+def censor_objects(image: np.ndarray, predictions: dict, method: str) -> np.ndarray:
+    """
+    Censor detected objects in an image using OpenCV.
+
+    Args:
+    image (np.ndarray): The original BGR image, censored in place.
+    predictions (dict): Predict dict containing detection results with bounding boxes (see transform_predict_to_dict).
+    method (str): Method of censorship ('blur' for Gaussian blur or 'mask' for a solid color mask). Default is 'blur'.
+
+    Returns:
+    np.ndarray: The censored BGR image.
+    """
+    # The image is already in OpenCV format (contiguous uint8 BGR)
+    open_cv_image = np.ascontiguousarray(image, dtype=np.uint8)
+
+    # Extract bounding box coordinates once as an int array, clipped to the image
+    height, width = open_cv_image.shape[:2]
+    bboxes = predictions['xyxy'].astype(int)
+    bboxes[:, [0, 2]] = bboxes[:, [0, 2]].clip(0, width)
+    bboxes[:, [1, 3]] = bboxes[:, [1, 3]].clip(0, height)
+
+    if method == 'blur':
+        # Skip empty boxes
+        bboxes = bboxes[(bboxes[:, 2] > bboxes[:, 0]) & (bboxes[:, 3] > bboxes[:, 1])]
+        x1, y1, x2, y2 = bboxes.T
+        # Pairwise overlap test on the boxes
+        overlap = (x1[:, None] < x2[None, :]) & (x1[None, :] < x2[:, None]) & \
+                  (y1[:, None] < y2[None, :]) & (y1[None, :] < y2[:, None])
+        np.fill_diagonal(overlap, False)
+
+        if not overlap.any():
+            # Non-overlapping boxes: blur each box on its own
+            for bx1, by1, bx2, by2 in bboxes:
+                open_cv_image[by1:by2, bx1:bx2] = blur_roi(open_cv_image[by1:by2, bx1:bx2])
+        else:
+            # Overlapping boxes: blur once the bounding rectangle of their union, padded by
+            # half the kernel so the result inside the boxes matches a whole-image blur
+            pad = CENSOR_BLUR_KSIZE[0] // 2
+            rx1, ry1 = max(int(x1.min()) - pad, 0), max(int(y1.min()) - pad, 0)
+            rx2, ry2 = min(int(x2.max()) + pad, width), min(int(y2.max()) + pad, height)
+            region = open_cv_image[ry1:ry2, rx1:rx2]
+            blurred = blur_roi(region)
+            # copy the blurred pixels inside the boxes
+            mask = np.zeros(region.shape[:2], dtype=bool)
+            for bx1, by1, bx2, by2 in bboxes:
+                mask[by1 - ry1:by2 - ry1, bx1 - rx1:bx2 - rx1] = True
+            np.copyto(region, blurred, where=mask[..., None])
+    elif method == 'mask':
+        for x1, y1, x2, y2 in bboxes:
             # Apply a solid color mask (black) to the specified area
             open_cv_image[y1:y2, x1:x2] = 0
 
-    # Convert back to PIL image from OpenCV format
-    censored_image = Image.fromarray(open_cv_image[:, :, ::-1])
-
-    return censored_image
+    return open_cv_image
 
-def segment_sample_model(input_image: Image) -> pd.DataFrame:
+def segment_sample_model(input_image: np.ndarray) -> pd.DataFrame:
     """
     Predict from sample_model.
     Base on YoloV8
 
     Args:
-        input_image (Image): The input image.
+        input_image (np.ndarray): The input BGR image.
 
     Returns:
         pd.Dataframe: Dataframe containing the object location and segmentation.
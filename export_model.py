@@ -0,0 +1,87 @@
+####################################### IMPORT #################################
+import argparse
+
+from ultralytics import YOLO
+
+
+######################### Export Func #################################
+
+def export_sample_model(weights: str = "./models/sample_model/best.pt", image_size: int = 768, batch: int = 8, workspace: int = 4, int8: bool = False, data: str = "./models/sample_model/calib.yaml") -> str:
+    """
+    Export the sample_model weights to a TensorRT engine (FP16, or INT8 with calibration).
+    The engine is written next to the weights (best.pt -> best.engine) and is
+    picked up by app.py on the next start when CUDA is available.
+
+    Args:
+        weights (str, optional): Path to the PyTorch weights. Defaults to "./models/sample_model/best.pt".
+        image_size (int, optional): The size of the image the engine will receive. Defaults to 768.
+        batch (int, optional): The maximum batch size of the dynamic engine, app.py sends at most
+            min(batch, DETECT_BATCH_SIZE) images per predict call. Defaults to 8.
+        workspace (int, optional): The TensorRT workspace size in GB. Defaults to 4.
+        int8 (bool, optional): Whether to quantize to INT8 instead of FP16. Defaults to False.
+        data (str, optional): Dataset yaml with the INT8 calibration images. Defaults to "./models/sample_model/calib.yaml".
+
+    Returns:
+        str: The path to the exported engine.
+    """
+    model = YOLO(weights)
+    # INT8 calibration images are only read when int8 is set
+    int8_args = {'int8': True, 'data': data} if int8 else {'half': True}
+    return model.export(
+                format="engine",
+                imgsz=image_size,
+                dynamic=True,
+                batch=batch,
+                workspace=workspace,
+                **int8_args,
+                )
+
+
+def compare_map(weights: str, engine: str, data: str, image_size: int = 768) -> dict:
+    """
+    Validate the PyTorch weights and the exported engine on the same held-out dataset,
+    to measure the mAP drop of the export. Use images that were not part of the
+    INT8 calibration set, otherwise the drop is underestimated.
+
+    Args:
+        weights (str): Path to the PyTorch weights.
+        engine (str): Path to the exported engine.
+        data (str): Dataset yaml with held-out labeled validation images.
+        image_size (int, optional): The validation image size. Defaults to 768.
+
+    Returns:
+        dict: mAP50-95 of both models, keyed by path.
+    """
+    return {
+        path: YOLO(path, task="detect").val(data=data, imgsz=image_size, batch=1, plots=False).box.map
+        for path in (weights, engine)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export sample_model to a TensorRT engine (run once on the target GPU).")
+    parser.add_argument("--weights", default="./models/sample_model/best.pt", help="path to the PyTorch weights")
+    parser.add_argument("--imgsz", type=int, default=768, help="inference image size")
+    parser.add_argument("--batch", type=int, default=8, help="max batch size of the dynamic engine (app.py batches at most min(--batch, DETECT_BATCH_SIZE) requests)")
+    parser.add_argument("--workspace", type=int, default=4, help="TensorRT workspace size (GB)")
+    parser.add_argument("--int8", action="store_true", help="quantize to INT8 (needs --data calibration images)")
+    parser.add_argument("--data", default="./models/sample_model/calib.yaml", help="dataset yaml used for INT8 calibration")
+    parser.add_argument("--val", action="store_true", help="compare mAP50-95 of the weights and the engine on --val-data")
+    parser.add_argument("--val-data", help="dataset yaml with held-out labeled images for --val (not the calibration images)")
+    args = parser.parse_args()
+    if args.val and not args.val_data:
+        parser.error("--val requires --val-data")
+
+    engine_path = export_sample_model(
+        weights=args.weights,
+        image_size=args.imgsz,
+        batch=args.batch,
+        workspace=args.workspace,
+        int8=args.int8,
+        data=args.data,
+    )
+    print(f"Engine saved to {engine_path}")
+
+    if args.val:
+        for path, map50_95 in compare_map(args.weights, engine_path, args.val_data, args.imgsz).items():
+            print(f"{path}: mAP50-95 {map50_95:.4f}")
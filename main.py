@@ -1,7 +1,7 @@
 ####################################### IMPORT #################################
 import json
 import pandas as pd
-from PIL import Image
+import numpy as np
 from loguru import logger
 import sys
 import uvicorn
@@ -13,6 +13,7 @@ from fastapi.exceptions import HTTPException
 from mangum import Mangum
 
 from router import detection_post
+from app import start_detect_batcher, stop_detect_batcher, warmup_sample_model
 # from router import tracking_post
 
 
@@ -75,6 +76,20 @@ def save_openapi_json():
     with open("openapi.json", "w") as file:
         json.dump(openapi_data, file)
 
+@app.on_event("startup")
+async def start_detection_workers():
+    '''Warm up the detection model, then start the background task
+    that batches concurrent detection requests into a single model call
+    (otherwise it is started by the first detection request).'''
+    warmup_sample_model()
+    start_detect_batcher()
+
+
+@app.on_event("shutdown")
+async def stop_detection_workers():
+    '''Stop the detection batching task.'''
+    await stop_detect_batcher()
+
 # redirect
 @app.get("/", include_in_schema=False,  tags=['docs'])
 async def redirect():
@@ -101,16 +116,16 @@ def perform_healthcheck():
 
 ######################### Support Func #################################
 
-def crop_image_by_predict(image: Image, predict: pd.DataFrame(), crop_class_name: str,) -> Image:
+def crop_image_by_predict(image: np.ndarray, predict: pd.DataFrame(), crop_class_name: str,) -> np.ndarray:
     """Crop an image based on the detection of a certain object in the image.
     
     Args:
-        image: Image to be cropped.
+        image (np.ndarray): BGR image to be cropped.
         predict (pd.DataFrame): Dataframe containing the prediction results of object detection model.
         crop_class_name (str, optional): The name of the object class to crop the image by. if not provided, function returns the first object found in the image.
     
     Returns:
-        Image: Cropped image or None
+        np.ndarray: Cropped image (a view of the input) or None
     """
     crop_predicts = predict[(predict['name'] == crop_class_name)]
 
@@ -121,9 +136,9 @@ def crop_image_by_predict(image: Image, predict: pd.DataFrame(), crop_class_name
     if len(crop_predicts) > 1:
         crop_predicts = crop_predicts.sort_values(by=['confidence'], ascending=False)
 
-    crop_bbox = crop_predicts[['xmin', 'ymin', 'xmax','ymax']].iloc[0].values
+    xmin, ymin, xmax, ymax = crop_predicts[['xmin', 'ymin', 'xmax','ymax']].iloc[0].values.astype(int)
     # crop
-    img_crop = image.crop(crop_bbox)
+    img_crop = image[ymin:ymax, xmin:xmax]
     return(img_crop)
 
 if __name__ == "__main__":
@@ -1,17 +1,16 @@
 ####################################### IMPORT #################################
-import json
 from loguru import logger
 import sys
 from starlette.responses import Response
 
-from fastapi import FastAPI, APIRouter, File
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, APIRouter, File, UploadFile
+from fastapi.responses import StreamingResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import HTTPException
+from starlette.concurrency import run_in_threadpool
 
 import io
 from PIL import Image
-from PIL import ImageDraw, ImageFont
 
 from app import get_image_from_bytes
 from app import detect_sample_model
@@ -19,145 +18,127 @@ from app import segment_sample_model
 from app import add_bboxs_on_img
 from app import get_bytes_from_image
 from app import censor_objects
+from app import add_no_objects_text
 
 router = APIRouter(prefix='/detection', tags=['Detection'])
 
 
+######################### Support Func #################################
+
+async def read_image(file: UploadFile):
+    """
+    Read and decode the uploaded image (decoding runs in the threadpool, off the event loop).
+
+    Args:
+        file (UploadFile): The uploaded image file.
+
+    Returns:
+        np.ndarray: The image in BGR format.
+
+    Raises:
+        HTTPException: 400 if the file is empty, not an image or too large.
+    """
+    try:
+        return await run_in_threadpool(get_image_from_bytes, await file.read())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 ######################### MAIN Func #################################
 
 
-@router.post("/img_object_detection_to_json")
-def img_object_detection_to_json(file: bytes = File(...)):
+@router.post("/img_object_detection_to_json", response_class=ORJSONResponse)
+async def img_object_detection_to_json(file: UploadFile = File(...)):
     """
     **Object Detection from an image.**
 
     **Args:**
-        - **file (bytes)**: The image file in bytes format.
+        - **file (UploadFile)**: The uploaded image file.
     **Returns:**
         - **dict**: JSON format containing the Objects Detections.
     """
     # Step 1: Initialize the result dictionary with None values
     result={'detect_objects': None}
 
-    # Step 2: Convert the image file to an image object
-    input_image = get_image_from_bytes(file)
+    # Step 2: Convert the image file to an image object (CPU-bound, off the event loop)
+    input_image = await read_image(file)
 
     # Step 3: Predict from model
-    predict = detect_sample_model(input_image)
+    predict = await detect_sample_model(input_image)
 
     # Check if no objects are detected
-    if len(predict) == 0:
+    if len(predict['name']) == 0:
         logger.info("No objects detected.")
-        return {"message": "No objects detected."}
-
-    detect_res = predict[['name', 'confidence']]
-    objects = detect_res['name'].values
+        return ORJSONResponse({"message": "No objects detected."})
 
     result = {
-        'detect_objects_names': ', '.join(objects),
-        'detect_objects': json.loads(detect_res.to_json(orient='records'))
+        'detect_objects_names': ', '.join(predict['name']),
+        'detect_objects': [{'name': name, 'confidence': float(conf)} for name, conf in zip(predict['name'], predict['confidence'])]
     }
-    return result
+    # returning the response directly skips FastAPI's jsonable_encoder pass
+    return ORJSONResponse(result)
 
 @router.post("/img_object_detection_to_img")
-def img_object_detection_to_img(file: bytes = File(...)):
+async def img_object_detection_to_img(file: UploadFile = File(...)):
     """
     **Object Detection from an image plot bbox on image**
 
     **Args:**
-        - **file (bytes)** The image file in bytes format.
+        - **file (UploadFile)** The uploaded image file.
     **Returns:**
         - **Image** Image in bytes with bbox annotations.
     """
-    # get image from bytes
-    input_image = get_image_from_bytes(file)
+    # get image from bytes (CPU-bound steps run in the threadpool, off the event loop)
+    input_image = await read_image(file)
 
     # model predict
-    predict = detect_sample_model(input_image)
+    predict = await detect_sample_model(input_image)
 
     # Check if no objects are detected
-    if len(predict) == 0:
+    if len(predict['name']) == 0:
         logger.info("NO OBJECTS DETECTED.")
 
         #Add annotated text to image stating no objects detected
-        draw = ImageDraw.Draw(input_image)
-        font = ImageFont.truetype("arial.ttf", 15)  # Adjust with your font path and size
-
-        text = "NO OBJECTS DETECTED."
-        x, y = 20, 20  # Text position
-        fill_color = (255, 165, 0)  # Orange color for the text
-        outline_color = 'black'  # Color for the outline
-
-        # Draw outline by offsetting the text position in all directions
-        for adj in range(-2, 3):  # Adjust range for thicker/thinner outline
-            # Move right and left
-            draw.text((x+adj, y), text, font=font, fill=outline_color)
-            # Move up and down
-            draw.text((x, y+adj), text, font=font, fill=outline_color)
-            # Diagonal moves
-            draw.text((x+adj, y+adj), text, font=font, fill=outline_color)
-            draw.text((x-adj, y-adj), text, font=font, fill=outline_color)
-
-        # Draw the main text
-        draw.text((x, y), text, font=font, fill=fill_color)
+        input_image = await run_in_threadpool(add_no_objects_text, input_image)
 
         # return annotated image in bytes format
-        return StreamingResponse(content=get_bytes_from_image(input_image), media_type="image/jpeg")
+        return StreamingResponse(content=await run_in_threadpool(get_bytes_from_image, input_image), media_type="image/jpeg")
     else:
-        final_image = add_bboxs_on_img(image = input_image, predict = predict)
+        final_image = await run_in_threadpool(add_bboxs_on_img, image = input_image, predict = predict)
         # return image in bytes format
-        return StreamingResponse(content=get_bytes_from_image(final_image), media_type="image/jpeg")
+        return StreamingResponse(content=await run_in_threadpool(get_bytes_from_image, final_image), media_type="image/jpeg")
 
     
 
 @router.post("/img_object_detection_to_censored_img")
-def img_object_detection_to_censored_img(file: bytes = File(...)):
+async def img_object_detection_to_censored_img(file: UploadFile = File(...)):
     """
     **Object Detection from an image plot bbox on image**
 
     **Args:**
-        - **file (bytes)** The image file in bytes format.
+        - **file (UploadFile)** The uploaded image file.
     **Returns:**
         - **Image** Image in bytes with bbox annotations.
     """
-    # get image from bytes
-    input_image = get_image_from_bytes(file)
+    # get image from bytes (CPU-bound steps run in the threadpool, off the event loop)
+    input_image = await read_image(file)
 
     # model predict
-    predict = detect_sample_model(input_image)
+    predict = await detect_sample_model(input_image)
 
     # Check if no objects are detected
-    if len(predict) == 0:
+    if len(predict['name']) == 0:
         logger.info("NO OBJECTS DETECTED.")
 
         #Add annotated text to image stating no objects detected
-        draw = ImageDraw.Draw(input_image)
-        font = ImageFont.truetype("arial.ttf", 15)  # Adjust with your font path and size
-
-        text = "NO OBJECTS DETECTED."
-        x, y = 20, 20  # Text position
-        fill_color = (255, 165, 0)  # Orange color for the text
-        outline_color = 'black'  # Color for the outline
-
-        # Draw outline by offsetting the text position in all directions
-        for adj in range(-2, 3):  # Adjust range for thicker/thinner outline
-            # Move right and left
-            draw.text((x+adj, y), text, font=font, fill=outline_color)
-            # Move up and down
-            draw.text((x, y+adj), text, font=font, fill=outline_color)
-            # Diagonal moves
-            draw.text((x+adj, y+adj), text, font=font, fill=outline_color)
-            draw.text((x-adj, y-adj), text, font=font, fill=outline_color)
-
-        # Draw the main text
-        draw.text((x, y), text, font=font, fill=fill_color)
+        input_image = await run_in_threadpool(add_no_objects_text, input_image)
 
         # return annotated image in bytes format
-        return StreamingResponse(content=get_bytes_from_image(input_image), media_type="image/jpeg")
+        return StreamingResponse(content=await run_in_threadpool(get_bytes_from_image, input_image), media_type="image/jpeg")
     else:
-        censored_image = censor_objects(input_image, predict, method='blur')
+        censored_image = await run_in_threadpool(censor_objects, input_image, predict, method='blur')
         # return image in bytes format
-        return StreamingResponse(content=get_bytes_from_image(censored_image), media_type="image/jpeg")
+        return StreamingResponse(content=await run_in_threadpool(get_bytes_from_image, censored_image), media_type="image/jpeg")
 
 
 